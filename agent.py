@@ -1,15 +1,27 @@
 
 import asyncio
-import json
 import os
 import ssl
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from mcp_agent.config import Settings
 from mcp_agent.core.fastagent import FastAgent
 from dotenv import load_dotenv
-from aiokafka import AIOKafkaConsumer, AIOKafkaProducer
+import orjson
+from aiokafka import AIOKafkaConsumer, AIOKafkaProducer, ConsumerRebalanceListener
 from aiokafka.abc import AbstractTokenProvider
+from aiokafka.admin import AIOKafkaAdminClient, NewTopic
+from aiokafka.errors import TopicAlreadyExistsError, for_code
+from aiokafka.structs import OffsetAndMetadata
+from aiokafka.record import default_records
 from aws_msk_iam_sasl_signer import MSKAuthTokenProvider
 
+try:
+    import uvloop
+except ImportError:  # Not available on Windows, fall back to the default asyncio loop
+    uvloop = None
+
 # Load environment variables
 load_dotenv()
 
@@ -17,69 +29,171 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# aiokafka silently uses its pure Python records when the Cython build is disabled or
+# missing (e.g. a pure Python wheel), so check which implementation it actually picked
+if default_records.DefaultRecordBatch is default_records._DefaultRecordBatchPy:
+    # Record framing, CRC and varint decoding run in pure Python without the C extensions
+    logger.warning("aiokafka C extensions are not in use, record decoding runs in pure Python")
+
 # MSK Configuration
 BOOTSTRAP_SERVERS = ['b-3-public.commandhive.aewd11.c4.kafka.ap-south-1.amazonaws.com:9198','b-1-public.commandhive.aewd11.c4.kafka.ap-south-1.amazonaws.com:9198', 'b-2-public.commandhive.aewd11.c4.kafka.ap-south-1.amazonaws.com:9198']
 TOPIC_NAME = 'mcp_agent_queen'
 AWS_REGION = os.environ.get('AWS_REGION', 'ap-south-1')
 CONSUMER_GROUP = 'mcp_agent_consumer'
+DLQ_TOPIC = 'mcp_agent_dlq'
+# A failed record's DLQ send is retried in place, doubling the delay between attempts
+DLQ_SEND_ATTEMPTS = 5
+DLQ_RETRY_DELAY_S = 1
+POLL_TIMEOUT_MS = 500
+MAX_POLL_RECORDS = 64
+# Pause a partition's fetches once this many records wait for its worker
+MAX_QUEUED_RECORDS = 128
+# Pinned below the broker's 10 minute idle reaper so the client closes idle connections first
+CONNECTIONS_MAX_IDLE_MS = 540000
+USER_MESSAGE_TYPES = frozenset({'user_message', 'user'})
+
+# MSK IAM tokens are valid for ~15 minutes
+TOKEN_EXPIRY_MARGIN_S = 60
+TOKEN_REFRESH_AHEAD_S = 120
+TOKEN_RETRY_DELAY_S = 5
+
+ERROR_LOG_BURST = 10
+ERROR_LOG_INTERVAL_S = 1.0
 
 def create_ssl_context():
     ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
-    ctx.options |= ssl.OP_NO_SSLv2 | ssl.OP_NO_SSLv3
-    ctx.check_hostname = False
-    ctx.verify_mode = ssl.CERT_NONE
+    # MSK brokers support TLS 1.3: 1-RTT handshakes and AEAD-only (AES-GCM) suites
+    ctx.minimum_version = ssl.TLSVersion.TLSv1_3
+    ctx.maximum_version = ssl.TLSVersion.TLSv1_3
+    ctx.post_handshake_auth = False
+    # PROTOCOL_TLS_CLIENT verifies the broker certificate and hostname by default
     ctx.load_default_certs()
     return ctx
 
 class AWSTokenProvider(AbstractTokenProvider):
     def __init__(self, region=AWS_REGION):
         self.region = region
+        self._cached = None  # (token, expiry on the time.monotonic() clock)
+        self._lock = asyncio.Lock()
+        self._refresh_task = None
+        # SigV4 signing gets its own threads so it never queues behind the default executor
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='msk-signer')
 
     async def token(self):
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(None, self._generate_token)
+        if self._is_fresh():
+            return self._cached[0]
+        return await self._refresh()
+
+    async def close(self):
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+        self._executor.shutdown(wait=False)
+
+    def _is_fresh(self):
+        return (
+            self._cached is not None
+            and time.monotonic() < self._cached[1] - TOKEN_EXPIRY_MARGIN_S
+        )
+
+    async def _refresh(self, force=False):
+        async with self._lock:
+            # Another caller may have signed a new token while we waited on the lock
+            if not force and self._is_fresh():
+                return self._cached[0]
+            loop = asyncio.get_running_loop()
+            self._cached = await loop.run_in_executor(self._executor, self._generate_token)
+            if self._refresh_task is None:
+                self._refresh_task = asyncio.create_task(self._refresh_loop())
+            return self._cached[0]
+
+    async def _refresh_loop(self):
+        """Re-sign the token ahead of expiry so reconnects never wait on SigV4"""
+        while True:
+            delay = self._cached[1] - TOKEN_REFRESH_AHEAD_S - time.monotonic()
+            await asyncio.sleep(max(delay, 0))
+            try:
+                await self._refresh(force=True)
+            except Exception as e:
+                logger.error("Failed to refresh MSK auth token: %s", e)
+                await asyncio.sleep(TOKEN_RETRY_DELAY_S)
 
     def _generate_token(self):
-        token, _ = MSKAuthTokenProvider.generate_auth_token(self.region)
-        return token
+        token, expiry_ms = MSKAuthTokenProvider.generate_auth_token(self.region)
+        # The signer reports a wall-clock expiry, convert it to the monotonic clock
+        return token, time.monotonic() + expiry_ms / 1000 - time.time()
+
+def deserialize_value(raw):
+    """Decode a record value as JSON, returning the raw bytes when it is not JSON"""
+    if not raw:
+        return None
+    try:
+        return orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        return raw
+
+# Shared by the consumer and producer so both reuse one SSL context and one token cache
+_SSL_CTX = create_ssl_context()
+_TOKEN_PROVIDER = AWSTokenProvider()
 
 async def create_consumer():
-    tp = AWSTokenProvider()
+    # Subscribed later, once the partition workers exist to act as rebalance listener
     consumer = AIOKafkaConsumer(
-        TOPIC_NAME,
         bootstrap_servers=BOOTSTRAP_SERVERS,
         group_id=CONSUMER_GROUP,
         security_protocol='SASL_SSL',
-        ssl_context=create_ssl_context(),
+        ssl_context=_SSL_CTX,
         sasl_mechanism='OAUTHBEARER',
-        sasl_oauth_token_provider=tp,
-        value_deserializer=lambda m: json.loads(m.decode('utf-8')) if m else None,
+        sasl_oauth_token_provider=_TOKEN_PROVIDER,
+        value_deserializer=deserialize_value,
         auto_offset_reset='latest',
-        enable_auto_commit=True,
+        enable_auto_commit=False,
+        max_poll_records=MAX_POLL_RECORDS,
+        # Bound prefetch so a slow LLM turn can't buffer unbounded records in memory
+        max_partition_fetch_bytes=256 * 1024,
+        fetch_max_bytes=1024 * 1024,
+        fetch_min_bytes=64 * 1024,
+        fetch_max_wait_ms=50,
+        connections_max_idle_ms=CONNECTIONS_MAX_IDLE_MS,
         client_id='mcp_agent_consumer',
     )
     await consumer.start()
+    # Open broker connections and load metadata now rather than on the first message
+    await consumer.topics()
+    await consumer._client.force_metadata_update()
     logger.info(f"Connected to MSK topic '{TOPIC_NAME}'")
     return consumer
 
 async def create_producer():
-    tp = AWSTokenProvider()
     producer = AIOKafkaProducer(
         bootstrap_servers=BOOTSTRAP_SERVERS,
         security_protocol='SASL_SSL',
-        ssl_context=create_ssl_context(),
+        ssl_context=_SSL_CTX,
         sasl_mechanism='OAUTHBEARER',
-        sasl_oauth_token_provider=tp,
-        value_serializer=lambda v: json.dumps(v).encode('utf-8'),
+        sasl_oauth_token_provider=_TOKEN_PROVIDER,
+        value_serializer=orjson.dumps,
         acks='all',
+        # JSON compresses well, trade a little CPU and linger for far fewer bytes on the wire
+        compression_type='lz4',
+        linger_ms=10,
+        max_batch_size=131072,
+        connections_max_idle_ms=CONNECTIONS_MAX_IDLE_MS,
         client_id='mcp_agent_producer'
     )
     await producer.start()
+    # The producer only ever writes to the dead letter topic, so that is the metadata worth
+    # loading. Best effort: the topic may be missing or not authorized for this role.
+    try:
+        await producer.client.force_metadata_update()
+        await producer.partitions_for(DLQ_TOPIC)
+    except Exception as e:
+        logger.warning("Could not load metadata for dead letter topic '%s': %s", DLQ_TOPIC, e)
     return producer
 
-# Load environment variables
-load_dotenv()
-
 # Simple JSON config for MCP
 simple_config = {
     "mcp": {
@@ -113,11 +227,15 @@ simple_config = {
             "security_protocol": "SASL_SSL",
             "sasl_mechanism": "OAUTHBEARER",
             "ssl_config": {
-                "check_hostname": False,
-                "verify_mode": "none"
+                "check_hostname": True,
+                "verify_mode": "required",
+                "minimum_version": "TLSv1.3"
             },
             "producer_config": {
                 "acks": "all",
+                "compression_type": "lz4",
+                "linger_ms": 10,
+                "max_batch_size": 131072,
                 "client_id": "mcp_agent_producer"
             },
             "consumer_config": {
@@ -132,13 +250,225 @@ simple_config = {
     }
 }
 
+# Validate the config once and hand FastAgent the resulting Settings
+_SETTINGS = Settings(**simple_config)
+
 # Create FastAgent instance
 fast = FastAgent(
     name="simple_queen",
-    json_config=simple_config,
+    settings=_SETTINGS,
     parse_cli_args=True  # Enable CLI argument parsing for model selection
 )
 
+_error_window_start = 0.0
+_errors_in_window = 0
+
+def should_log_error():
+    """Allow at most ERROR_LOG_BURST tracebacks per ERROR_LOG_INTERVAL_S window"""
+    global _error_window_start, _errors_in_window
+    now = time.monotonic()
+    if now - _error_window_start >= ERROR_LOG_INTERVAL_S:
+        _error_window_start = now
+        _errors_in_window = 0
+    _errors_in_window += 1
+    return _errors_in_window <= ERROR_LOG_BURST
+
+async def create_dlq_topic():
+    """Create the dead letter topic up front so the first failed record doesn't wait on metadata"""
+    admin_client = AIOKafkaAdminClient(
+        bootstrap_servers=BOOTSTRAP_SERVERS,
+        security_protocol='SASL_SSL',
+        ssl_context=_SSL_CTX,
+        sasl_mechanism='OAUTHBEARER',
+        sasl_oauth_token_provider=_TOKEN_PROVIDER,
+        client_id='mcp_agent_admin',
+    )
+    try:
+        await admin_client.start()
+        response = await admin_client.create_topics(
+            [NewTopic(name=DLQ_TOPIC, num_partitions=3, replication_factor=2)]
+        )
+        # Per-topic failures come back as error codes in the response, not as exceptions
+        for topic_error in response.topic_errors:
+            error_code = topic_error[1]
+            if error_code == 0:
+                logger.info("Created dead letter topic '%s'", DLQ_TOPIC)
+            elif error_code != TopicAlreadyExistsError.errno:
+                logger.error(
+                    "Failed to create dead letter topic '%s': %s", DLQ_TOPIC, for_code(error_code)
+                )
+    except Exception as e:
+        logger.error("Failed to create dead letter topic '%s': %s", DLQ_TOPIC, e)
+    finally:
+        await admin_client.close()
+
+async def send_to_dlq(producer, message, error):
+    """Park a record that failed processing on the dead letter topic, retrying with backoff"""
+    payload = {
+        'topic': message.topic,
+        'partition': message.partition,
+        'offset': message.offset,
+        'error': str(error),
+        'value': message.value.decode('utf-8', errors='replace')
+        if type(message.value) is bytes else message.value,
+    }
+    delay = DLQ_RETRY_DELAY_S
+    for attempt in range(1, DLQ_SEND_ATTEMPTS + 1):
+        try:
+            await producer.send_and_wait(DLQ_TOPIC, payload)
+            return
+        except Exception as e:
+            if attempt == DLQ_SEND_ATTEMPTS:
+                # Committed past regardless, the record stays readable at this offset until retention
+                logger.error(
+                    "Dropping message %s[%d]@%d after %d failed sends to %s: %s",
+                    message.topic, message.partition, message.offset, attempt, DLQ_TOPIC, e,
+                )
+                return
+            logger.warning(
+                "Failed to send message %s[%d]@%d to %s, retrying in %ss: %s",
+                message.topic, message.partition, message.offset, DLQ_TOPIC, delay, e,
+            )
+            await asyncio.sleep(delay)
+            delay *= 2
+
+async def handle_message(agent, producer, message, agent_lock):
+    """Extract the user content from a single record and forward it to the assistant.
+
+    The assistant keeps one conversation history, so its turns are serialized on
+    agent_lock while parsing and dead-lettering can overlap across partitions.
+    """
+    try:
+        value = message.value
+        if not value:
+            return
+
+        logger.info("Received message: %s", value)
+
+        # Extract user content from message
+        user_content = None
+        value_type = type(value)
+        if value_type is dict:
+            if value.get('type') in USER_MESSAGE_TYPES:
+                user_content = value.get('content')
+        elif value_type is bytes:
+            # Not JSON, the deserializer hands back the payload as-is
+            user_content = value.decode('utf-8', errors='replace')
+        elif value_type is str:
+            # A JSON string literal
+            user_content = value
+
+        if user_content:
+            logger.info("👤 User: %s", user_content)
+
+            # Send to agent and get response
+            async with agent_lock:
+                response = await agent.assistant(user_content)
+            logger.info("🤖 Assistant: %s", response)
+
+    except Exception as e:
+        if should_log_error():
+            logger.exception(
+                "Error processing message %s[%d]@%d",
+                message.topic, message.partition, message.offset,
+            )
+        await send_to_dlq(producer, message, e)
+
+class PartitionWorkers(ConsumerRebalanceListener):
+    """One queue and worker task per assigned partition.
+
+    Partitions overlap fetching, parsing and committing while records (and so
+    keys) within a partition stay in order; the assistant itself takes one turn
+    at a time. As the consumer's rebalance listener it retires the workers of
+    revoked partitions once their current record is done and commits their
+    progress, so the new owner picks up exactly where they stopped.
+    """
+
+    def __init__(self, agent, consumer, producer):
+        self.agent = agent
+        self.consumer = consumer
+        self.producer = producer
+        self._queues = {}
+        self._workers = {}
+        self._agent_lock = asyncio.Lock()
+        # Offset after the last handled record, per partition, until it is committed
+        self._next_offsets = {}
+
+    def queue_for(self, tp):
+        queue = self._queues.get(tp)
+        if queue is None:
+            queue = self._queues[tp] = asyncio.Queue()
+            self._workers[tp] = asyncio.create_task(self._run(tp, queue))
+        return queue
+
+    async def on_partitions_assigned(self, assigned):
+        for tp in assigned:
+            self.queue_for(tp)
+
+    async def on_partitions_revoked(self, revoked):
+        # Queued records are dropped with their worker, the new owner fetches them
+        # again from the committed offset. A turn in flight is allowed to finish so
+        # the assistant's history is never left half-written.
+        await self._retire(revoked)
+        await self._commit(revoked)
+        # Even if that commit failed, progress from this ownership must never be
+        # committed later, it could move the group's offset backwards
+        for tp in revoked:
+            self._next_offsets.pop(tp, None)
+
+    async def stop(self):
+        partitions = list(self._workers)
+        await self._retire(partitions)
+        await self._commit(partitions)
+
+    async def _retire(self, partitions):
+        workers = []
+        for tp in partitions:
+            queue = self._queues.pop(tp, None)
+            worker = self._workers.pop(tp, None)
+            if worker is not None:
+                # Wakes an idle worker, a busy one notices it was retired after its record
+                queue.put_nowait(None)
+                workers.append(worker)
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _commit(self, partitions):
+        offsets = {
+            tp: OffsetAndMetadata(self._next_offsets[tp], '')
+            for tp in partitions
+            if tp in self._next_offsets
+        }
+        if not offsets:
+            return
+        try:
+            await self.consumer.commit(offsets)
+        except Exception as e:
+            logger.error("Failed to commit offsets for %s: %s", list(offsets), e)
+            return
+        for tp, committed in offsets.items():
+            # A worker may have moved on while the commit was in flight
+            if self._next_offsets.get(tp) == committed.offset:
+                del self._next_offsets[tp]
+
+    async def _run(self, tp, queue):
+        """Handle one partition's records in order, committing after each drained batch"""
+        while True:
+            records = [await queue.get()]
+            while not queue.empty():
+                records.append(queue.get_nowait())
+
+            for record in records:
+                if self._queues.get(tp) is not queue:
+                    return
+                await handle_message(self.agent, self.producer, record, self._agent_lock)
+                self._next_offsets[tp] = record.offset + 1
+
+            # Caught up with the backlog, let the fetcher deliver this partition again
+            if queue.empty() and tp in self.consumer.paused():
+                self.consumer.resume(tp)
+
+            await self._commit([tp])
+
 @fast.agent(
     name="assistant",
     instruction="""You are a helpful AI assistant. You can:
@@ -156,7 +486,14 @@ async def main():
     
     # Create Kafka consumer and producer
     consumer = await create_consumer()
-    producer = await create_producer()
+    try:
+        # The dead letter topic must exist before the producer warms its metadata
+        await create_dlq_topic()
+        producer = await create_producer()
+    except BaseException:
+        await consumer.stop()
+        await _TOKEN_PROVIDER.close()
+        raise
     
     async with fast.run() as agent:
         logger.info("🤖 MCP Agent is ready and listening for messages!")
@@ -164,59 +501,40 @@ async def main():
         logger.info("Send messages using the producer script to interact with the agent")
         logger.info("-" * 50)
         
+        workers = PartitionWorkers(agent, consumer, producer)
+        consumer.subscribe([TOPIC_NAME], listener=workers)
+
         try:
-            # Listen for messages from MSK
-            async for message in consumer:
-                try:
-                    if not message.value:
-                        continue
-                    
-                    logger.info("Received message: %s", message.value)
-                    
-                    # Extract user content from message
-                    user_content = None
-                    if isinstance(message.value, dict):
-                        if message.value.get('type') == 'user_message' and 'content' in message.value:
-                            user_content = message.value['content']
-                        elif message.value.get('type') == 'user' and 'content' in message.value:
-                            user_content = message.value['content']
-                    elif isinstance(message.value, str):
-                        # Try to parse as JSON first
-                        try:
-                            data_obj = json.loads(message.value)
-                            if data_obj.get('type') in ['user_message', 'user'] and 'content' in data_obj:
-                                user_content = data_obj['content']
-                            else:
-                                user_content = message.value
-                        except json.JSONDecodeError:
-                            user_content = message.value
-                    
-                    if user_content:
-                        logger.info("👤 User: %s", user_content)
-                        
-                        # Send to agent and get response
-                        response = await agent.assistant(user_content)
-                        logger.info("🤖 Assistant: %s", response)
-                        
-                        
-                    
-                except Exception as e:
-                    logger.error("Error processing message: %s", e)
-                    import traceback
-                    traceback.print_exc()
-                    
+            # Poll MSK in batches so fetch and dispatch costs are paid once per batch
+            while True:
+                batches = await consumer.getmany(
+                    timeout_ms=POLL_TIMEOUT_MS, max_records=MAX_POLL_RECORDS
+                )
+                for tp, records in batches.items():
+                    queue = workers.queue_for(tp)
+                    for record in records:
+                        queue.put_nowait(record)
+                    if queue.qsize() >= MAX_QUEUED_RECORDS:
+                        consumer.pause(tp)
+
         except KeyboardInterrupt:
             logger.info("Received interrupt signal, shutting down...")
         except Exception as e:
             logger.error("Fatal error: %s", e)
         finally:
+            await workers.stop()
             await consumer.stop()
             await producer.stop()
+            await _TOKEN_PROVIDER.close()
             logger.info("Consumer and producer stopped.")
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        if uvloop is not None:
+            # libuv-backed loop for the socket-heavy Kafka, TLS and LLM HTTP traffic
+            uvloop.run(main())
+        else:
+            asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("👋 Goodbye!")
         pass
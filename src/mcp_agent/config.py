@@ -3,6 +3,7 @@ Reading settings from environment variables and providing a settings object
 for the application configuration.
 """
 
+import functools
 import os
 import re
 from pathlib import Path
@@ -11,6 +12,9 @@ from typing import Any, Dict, List, Literal, Optional
 from pydantic import BaseModel, ConfigDict, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+_FILE_SCHEME = "file://"
+_FILE_SCHEME_LEN = len(_FILE_SCHEME)
+
 
 class MCPServerAuthSettings(BaseModel):
     """Represents authentication configuration for a server."""
@@ -42,7 +46,7 @@ class MCPRootSettings(BaseModel):
     @classmethod
     def validate_uri(cls, v: str) -> str:
         """Validate that the URI starts with file:// (required by specification 2024-11-05)"""
-        if v and not v.startswith("file://"):
+        if v and v[:_FILE_SCHEME_LEN] != _FILE_SCHEME:
             raise ValueError("Root URI must start with file://")
         return v
 
@@ -370,25 +374,87 @@ class Settings(BaseSettings):
     @classmethod
     def find_config(cls) -> Path | None:
         """Find the config file in the current directory or parent directories."""
-        current_dir = Path.cwd()
+        start_dir = Path.cwd()
+        # Only hits are cached, and only while the file is still there, so a
+        # config created or removed after the first lookup is noticed
+        config_path = _found_configs.get(start_dir)
+        if config_path is not None and config_path.exists():
+            return config_path
+
+        config_path = _find_config_from(start_dir)
+        if config_path is None:
+            _found_configs.pop(start_dir, None)
+        else:
+            _found_configs[start_dir] = config_path
+        return config_path
+
+
+# Config file found for each starting directory, see Settings.find_config
+_found_configs: Dict[Path, Path] = {}
+
+
+def _find_config_from(start_dir: Path) -> Path | None:
+    """Walk up from start_dir looking for a config file."""
+    current_dir = start_dir
 
-        # Check current directory and parent directories
-        while current_dir != current_dir.parent:
-            for filename in [
-                "fastagent.config.yaml",
-            ]:
-                config_path = current_dir / filename
-                if config_path.exists():
-                    return config_path
-            current_dir = current_dir.parent
+    # Check current directory and parent directories
+    while current_dir != current_dir.parent:
+        for filename in [
+            "fastagent.config.yaml",
+        ]:
+            config_path = current_dir / filename
+            if config_path.exists():
+                return config_path
+        current_dir = current_dir.parent
 
-        return None
+    return None
 
 
 # Global settings object
 _settings: Settings | None = None
 
 
+@functools.lru_cache(maxsize=16)
+def _load_yaml_file(path: Path, mtime_ns: int, size: int) -> dict:
+    """Parse a YAML file. The stat fields are part of the cache key so edits are picked up."""
+    import yaml  # pylint: disable=C0415
+
+    # Prefer the libyaml-backed loader, falling back to pure Python when it isn't compiled in
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with open(path, "r", encoding="utf-8") as f:
+        return yaml.load(f, Loader=loader) or {}
+
+
+def _read_yaml(path: Path) -> dict:
+    """Load a YAML config file, reusing the parsed result until the file changes.
+
+    The returned dict is shared between callers and must not be mutated.
+    """
+    stat = path.stat()
+    return _load_yaml_file(path.resolve(), stat.st_mtime_ns, stat.st_size)
+
+
+def deep_merge(base: dict, update: dict) -> dict:
+    """Merge two dictionaries, preserving nested structures.
+
+    Walks the nesting with an explicit stack. Only dicts present on both sides are
+    copied; values taken from `update` are assigned by reference.
+    """
+    merged = dict(base)
+    stack = [(merged, update)]
+    while stack:
+        target, source = stack.pop()
+        for key, value in source.items():
+            existing = target.get(key)
+            if isinstance(value, dict) and isinstance(existing, dict):
+                nested = dict(existing)
+                target[key] = nested
+                stack.append((nested, value))
+            else:
+                target[key] = value
+    return merged
+
+
 def get_settings(config_path: str | None = None, json_config: dict | None = None) -> Settings:
     """
     Get settings instance, automatically loading from config file if available or using provided JSON config.
@@ -401,16 +467,6 @@ def get_settings(config_path: str | None = None, json_config: dict | None = None
         Settings: The loaded settings
     """
 
-    def deep_merge(base: dict, update: dict) -> dict:
-        """Recursively merge two dictionaries, preserving nested structures."""
-        merged = base.copy()
-        for key, value in update.items():
-            if key in merged and isinstance(merged[key], dict) and isinstance(value, dict):
-                merged[key] = deep_merge(merged[key], value)
-            else:
-                merged[key] = value
-        return merged
-
     global _settings
 
     # If direct JSON config is provided, create settings from it
@@ -446,12 +502,8 @@ def get_settings(config_path: str | None = None, json_config: dict | None = None
         if not config_file.exists():
             print(f"Warning: Specified config file does not exist: {config_file}")
         else:
-            import yaml  # pylint: disable=C0415
-
             # Load main config
-            with open(config_file, "r", encoding="utf-8") as f:
-                yaml_settings = yaml.safe_load(f) or {}
-                merged_settings = yaml_settings
+            merged_settings = _read_yaml(config_file)
             # Look for secrets files recursively up the directory tree
             # but stop after finding the first one
             current_dir = config_file.parent
@@ -465,11 +517,10 @@ def get_settings(config_path: str | None = None, json_config: dict | None = None
                 ]:
                     secrets_file = current_dir / secrets_filename
                     if secrets_file.exists():
-                        with open(secrets_file, "r", encoding="utf-8") as f:
-                            yaml_secrets = yaml.safe_load(f) or {}
-                            merged_settings = deep_merge(merged_settings, yaml_secrets)
-                            found_secrets = True
-                            break
+                        yaml_secrets = _read_yaml(secrets_file)
+                        merged_settings = deep_merge(merged_settings, yaml_secrets)
+                        found_secrets = True
+                        break
                 if not found_secrets:
                     # Get the absolute path of the parent directory
                     current_dir = current_dir.parent.resolve()
@@ -83,6 +83,7 @@ class FastAgent:
         json_config: dict | None = None,
         ignore_unknown_args: bool = False,
         parse_cli_args: bool = True,  # Add new parameter with default True
+        settings: config.Settings | None = None,
     ) -> None:
         """
         Initialize the fast-agent application.
@@ -96,6 +97,8 @@ class FastAgent:
             parse_cli_args: If True, parse command line arguments using argparse.
                             Set to False when embedding FastAgent in another framework
                             (like FastAPI/Uvicorn) that handles its own arguments.
+            settings: Optional already validated Settings object, used as-is without
+                      re-validation (alternative to json_config and config_path)
         """
         self.args = argparse.Namespace()  # Initialize args always
         print("fastagent initial with version 0.3.0 with managed kafka support")
@@ -179,6 +182,7 @@ class FastAgent:
         self.name = name
         self.config_path = config_path
         self.json_config = json_config
+        self.settings = settings
 
         try:
             # Load configuration directly for this instance
@@ -188,7 +192,17 @@ class FastAgent:
             self.pubsub_enabled = False
             self.pubsub_config = None
             
-            if hasattr(self, "json_config") and self.json_config is not None:
+            if self.settings is not None:
+                # pubsub_config is not a declared field, it is kept as an extra on Settings
+                self.pubsub_enabled = self.settings.pubsub_enabled
+                self.pubsub_config = getattr(self.settings, "pubsub_config", None)
+
+                # Hand the validated settings straight to MCPApp so they aren't parsed again
+                self.app = MCPApp(
+                    name=name,
+                    settings=self.settings,
+                )
+            elif hasattr(self, "json_config") and self.json_config is not None:
                 # Check for pubsub configuration in JSON config
                 self.pubsub_enabled = self.json_config.get("pubsub_enabled", False)
                 self.pubsub_config = self.json_config.get("pubsub_config", None)
@@ -246,8 +260,12 @@ class FastAgent:
         _settings = None
 
         try:
+            if self.settings is not None:
+                # Already validated by the caller
+                settings = self.settings
+                logger.debug("Using provided Settings object")
             # Check if json_config is provided, prioritize it over config_path
-            if hasattr(self, 'json_config') and self.json_config is not None:
+            elif hasattr(self, 'json_config') and self.json_config is not None:
                 # Use the provided JSON configuration directly
                 settings = get_settings(json_config=self.json_config)
                 logger.debug("Loading configuration from provided JSON dictionary")
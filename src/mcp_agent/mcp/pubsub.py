@@ -401,6 +401,8 @@ class MSKPubSubChannel(PubSubChannel):
         # Default MSK configuration
         self.bootstrap_servers = self.msk_config.get('bootstrap_servers', ['localhost:9092'])
         self.aws_region = self.msk_config.get('aws_region', 'ap-south-1')
+        # Sends are pipelined, wait for broker acks once every `flush_every` messages
+        self.flush_every = self.msk_config.get('flush_every', 100)
         
         # Producer configuration
         self.producer_config = {
@@ -433,16 +435,43 @@ class MSKPubSubChannel(PubSubChannel):
         self._is_consuming = False
         self._ssl_context = None
         self._token_provider = None
+        self._unflushed = 0
         
     def _create_ssl_context(self):
-        """Create SSL context for MSK connection."""
+        """Create SSL context for MSK connection from the optional ssl_config block."""
         if not self._ssl_context:
             import ssl
+            ssl_config = self.msk_config.get('ssl_config', {})
+            verify_modes = {
+                'none': ssl.CERT_NONE,
+                'optional': ssl.CERT_OPTIONAL,
+                'required': ssl.CERT_REQUIRED,
+            }
+            tls_versions = {
+                'TLSv1.2': ssl.TLSVersion.TLSv1_2,
+                'TLSv1.3': ssl.TLSVersion.TLSv1_3,
+            }
+            verify_mode = ssl_config.get('verify_mode', 'none')
+            if verify_mode not in verify_modes:
+                raise ValueError(
+                    f"Invalid ssl_config verify_mode {verify_mode!r}, "
+                    f"expected one of {', '.join(verify_modes)}"
+                )
+            minimum_version = ssl_config.get('minimum_version')
+            if minimum_version is not None and minimum_version not in tls_versions:
+                raise ValueError(
+                    f"Invalid ssl_config minimum_version {minimum_version!r}, "
+                    f"expected one of {', '.join(tls_versions)}"
+                )
             self._ssl_context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
             self._ssl_context.options |= ssl.OP_NO_SSLv2
             self._ssl_context.options |= ssl.OP_NO_SSLv3
+            if minimum_version is not None:
+                self._ssl_context.minimum_version = tls_versions[minimum_version]
+            # check_hostname must be off before verify_mode can be lowered to CERT_NONE
             self._ssl_context.check_hostname = False
-            self._ssl_context.verify_mode = ssl.CERT_NONE
+            self._ssl_context.verify_mode = verify_modes[verify_mode]
+            self._ssl_context.check_hostname = ssl_config.get('check_hostname', False)
             self._ssl_context.load_default_certs()
         return self._ssl_context
     
@@ -645,10 +674,17 @@ class MSKPubSubChannel(PubSubChannel):
                 
         if self.producer:
             try:
+                # Deliver anything still pipelined before closing the connection
+                await self.producer.flush()
                 await self.producer.stop()
             except Exception:
                 pass
     
+    def _on_send_done(self, send_future: asyncio.Future) -> None:
+        """Report delivery failures for pipelined sends."""
+        if not send_future.cancelled() and send_future.exception() is not None:
+            print(f"Failed to publish message to MSK topic {self.topic}: {send_future.exception()}")
+    
     async def publish(self, message: Any) -> None:
         """
         Publish a message to MSK and local subscribers.
@@ -670,8 +706,13 @@ class MSKPubSubChannel(PubSubChannel):
                 else:
                     msk_message = str(message)
                 
-                record_metadata = await self.producer.send_and_wait(self.topic, msk_message)
-                # print(f"Published message to MSK topic {self.topic} at partition {record_metadata.partition}, offset {record_metadata.offset}")
+                # Only enqueue the batch here so the broker round trip stays off the reply path
+                send_future = await self.producer.send(self.topic, msk_message)
+                send_future.add_done_callback(self._on_send_done)
+                self._unflushed += 1
+                if self._unflushed >= self.flush_every:
+                    self._unflushed = 0
+                    await self.producer.flush()
                 
             except Exception as e:
                 # print(f"Failed to publish message to MSK topic {self.topic}: {e}")
@@ -0,0 +1,110 @@
+"""Tests for settings loading and caching in mcp_agent.config."""
+
+import os
+
+import pytest
+import yaml
+from pydantic import ValidationError
+
+from mcp_agent.config import MCPRootSettings, Settings, deep_merge, get_settings
+
+
+def write_config(file_path, data: dict) -> None:
+    with open(file_path, "w", encoding="utf-8") as f:
+        yaml.dump(data, f)
+
+
+def test_identical_json_config_not_shared():
+    config = {"default_model": "sonnet", "mcp": {"servers": {"fetch": {"command": "uvx"}}}}
+
+    first = get_settings(json_config=config)
+    first.mcp.servers["fetch"].command = "npx"
+    second = get_settings(json_config=config)
+
+    assert second.mcp.servers["fetch"].command == "uvx"
+
+
+def test_different_json_config_gets_own_settings():
+    first = get_settings(json_config={"default_model": "sonnet"})
+    second = get_settings(json_config={"default_model": "haiku"})
+
+    assert first is not second
+    assert first.default_model == "sonnet"
+    assert second.default_model == "haiku"
+
+
+def test_config_file_reloaded_after_change(tmp_path):
+    config_file = tmp_path / "fastagent.config.yaml"
+    write_config(config_file, {"default_model": "sonnet"})
+    assert get_settings(str(config_file)).default_model == "sonnet"
+
+    write_config(config_file, {"default_model": "haiku"})
+    # Force a distinct mtime in case both writes land in the same clock tick
+    stat = config_file.stat()
+    os.utime(config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert get_settings(str(config_file)).default_model == "haiku"
+
+
+def test_secrets_merged_into_config(tmp_path):
+    write_config(tmp_path / "fastagent.config.yaml", {"anthropic": {"base_url": "http://local"}})
+    write_config(tmp_path / "fastagent.secrets.yaml", {"anthropic": {"api_key": "secret"}})
+
+    settings = get_settings(str(tmp_path / "fastagent.config.yaml"))
+
+    assert settings.anthropic.base_url == "http://local"
+    assert settings.anthropic.api_key == "secret"
+
+
+def test_deep_merge_nested_without_mutating_inputs():
+    base = {"mcp": {"servers": {"fetch": {"command": "uvx"}}}, "logger": {"level": "info"}}
+    update = {"mcp": {"servers": {"fetch": {"args": ["x"]}, "time": {}}}, "default_model": "haiku"}
+
+    merged = deep_merge(base, update)
+
+    assert merged == {
+        "mcp": {"servers": {"fetch": {"command": "uvx", "args": ["x"]}, "time": {}}},
+        "logger": {"level": "info"},
+        "default_model": "haiku",
+    }
+    assert base == {"mcp": {"servers": {"fetch": {"command": "uvx"}}}, "logger": {"level": "info"}}
+    assert "args" not in base["mcp"]["servers"]["fetch"]
+
+
+def test_deep_merge_replaces_non_dict_values():
+    assert deep_merge({"a": {"b": 1}}, {"a": 2}) == {"a": 2}
+    assert deep_merge({"a": 1}, {"a": {"b": 2}}) == {"a": {"b": 2}}
+
+
+def test_root_uri_requires_file_scheme():
+    root = MCPRootSettings(uri="file:///tmp/data", server_uri_alias="file:///data")
+    assert root.uri == "file:///tmp/data"
+
+    with pytest.raises(ValidationError, match="Root URI must start with file://"):
+        MCPRootSettings(uri="http://example.com")
+    with pytest.raises(ValidationError):
+        MCPRootSettings(uri="file:/", server_uri_alias="file:/")
+
+
+def test_find_config_searches_parents(tmp_path, monkeypatch):
+    config_file = tmp_path / "fastagent.config.yaml"
+    write_config(config_file, {})
+    nested = tmp_path / "a" / "b"
+    nested.mkdir(parents=True)
+    monkeypatch.chdir(nested)
+
+    assert Settings.find_config() == config_file
+    assert Settings.find_config() == config_file
+
+
+def test_find_config_picks_up_config_created_after_miss(tmp_path, monkeypatch):
+    nested = tmp_path / "a"
+    nested.mkdir()
+    monkeypatch.chdir(nested)
+    miss = Settings.find_config()
+
+    config_file = tmp_path / "fastagent.config.yaml"
+    write_config(config_file, {})
+
+    assert miss != config_file
+    assert Settings.find_config() == config_file